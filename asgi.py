@@ -0,0 +1,38 @@
+"""
+ASGI entry point for the blog posts API.
+
+Wraps the Flask WSGI app so it can be served by uvicorn, whose HTTP
+parser (httptools) and event loop (uvloop) are implemented in C::
+
+    uvicorn asgi:asgi_app --workers 1 --loop uvloop --http httptools
+
+Keep a single worker: posts live in the app process's memory, so separate
+worker processes would each serve their own posts and hand out colliding
+IDs. Within that worker, each request runs the WSGI app on a thread from
+the event loop's default thread pool, so requests are served concurrently
+up to the pool's size. Don't set GEVENT=1 here.
+"""
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from backend.backend_app import app
+
+
+class _ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """A `WsgiToAsgiInstance` that runs the WSGI app on a thread pool."""
+
+    # asgiref runs it thread-sensitively by default: on one thread shared
+    # by every request, which would serve them one at a time
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.run_wsgi_app.__wrapped__, thread_sensitive=False)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """A `WsgiToAsgi` adapter whose requests run on a thread pool."""
+
+    async def __call__(self, scope, receive, send):
+        await _ThreadPoolWsgiToAsgiInstance(self.wsgi_application, self.duplicate_header_limit)(
+            scope, receive, send
+        )
+
+
+asgi_app = ThreadPoolWsgiToAsgi(app)
@@ -1,63 +1,694 @@
-from flask import Flask, request, jsonify
+"""
+Blog posts REST API.
+
+For development, run this module directly. In production, serve it with
+a single Gunicorn gevent worker::
+
+    GEVENT=1 gunicorn -k gevent -w 1 --worker-connections 1000 backend.backend_app:app
+
+Posts, the ID counter and the ETag epoch all live in this process's
+memory, so every worker process would serve its own separate set of posts
+and hand out colliding IDs. Concurrency comes from the worker's gevent
+connections instead; serving from several processes would first need the
+posts moved to external storage.
+
+GEVENT=1 makes the module monkey-patch the standard library before Flask
+is imported, so sockets and locks cooperate with the gevent event loop.
+
+Alternatively, serve it under uvicorn through the ASGI wrapper in
+``asgi.py`` at the repository root.
+
+The module is fully type-annotated pure Python, so the request hot paths
+can be sped up without source changes by running under PyPy, or by
+compiling it with mypyc (``cd backend && mypyc backend_app.py``), which
+places an extension module next to this file that the launch command
+above imports in its place.
+"""
+import gzip
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from functools import partial
+from itertools import compress, islice
+from operator import attrgetter
+from typing import Any, Callable, Generic, Mapping, NamedTuple, Optional, TypeVar, Union
+
+if os.environ.get("GEVENT") == "1":
+    from gevent import monkey  # type: ignore[import-untyped]
+    monkey.patch_all()
+
+import orjson
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
+from flask.typing import ResponseReturnValue
 from flask_cors import CORS
 
+try:
+    import brotli  # type: ignore
+except ImportError:  # Brotli is optional; without it only gzip is offered
+    brotli = None
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Every `jsonify` call is routed through `app.json`, so installing this
+    provider moves response serialization from the stdlib `json` module
+    to orjson without touching the individual views.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        # `_app` is typed as the sansio base app, whose response class
+        # doesn't declare a body argument; at runtime it's the Flask app.
+        return self._app.response_class(body, mimetype="application/json")  # type: ignore[arg-type, return-value]
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)  # This will enable CORS for all routes
 
-POSTS = [
+# Posts are stored column-wise: row i of each column holds one field of
+# the same version of a post. Scans over a single column (search, sort)
+# then walk a flat sequence of strings instead of dereferencing a dict per
+# post.
+#
+# The store is multi-versioned. Rows are only ever appended to the shared
+# `_Log`: creating a post appends a row, updating it appends another row
+# with the new version of the post, and updates and deletes stamp the row
+# they replace with the version it stopped being current in. A `_Snapshot`
+# is a row count and a version; it sees the rows below its count that
+# were still current at its version. Readers grab the current snapshot
+# once and work on it without locking, since writers never change anything
+# a published snapshot sees. Writers hold `_WRITE_LOCK`, apply their changes
+# as the next version and publish a new snapshot, so a write costs the same
+# however many posts are stored. Concurrent writes are queued and published
+# together as one version (see `_write`).
+#
+# Once replaced rows outnumber current ones, the log is compacted: every
+# publish copies a few more of its current rows to a fresh successor log,
+# and writers switch to the successor once it has caught up. Copying a row
+# costs about as much as writing it, so while a compaction runs each write
+# does a bounded amount of extra work instead of the store pausing for a
+# rebuild that grows with it.
+_ALIVE = sys.maxsize
+
+# The number of replaced rows a log may hold on top of one per current row
+# before it is compacted.
+_COMPACT_SLACK = 1024
+
+# The number of rows each publish copies to the successor of a log being
+# compacted, on top of the rows it appended.
+_COMPACT_STEP = 8
+
+
+class _Log:
+    """The append-only rows and indexes shared by the snapshots built on them."""
+
+    def __init__(self) -> None:
+        self.ids: list[int] = []
+        self.titles: list[str] = []
+        self.contents: list[str] = []
+        self.titles_lc: list[str] = []
+        self.contents_lc: list[str] = []
+        # The version each row stopped being current in, or _ALIVE.
+        self.died: list[int] = []
+        # The row holding the previous version of the same post, or -1.
+        self.prev: list[int] = []
+        # Maps a post ID to the row of its latest version.
+        self.row_by_id: dict[int, int] = {}
+        # Inverted trigram indexes mapping every 3-character substring of
+        # the lower-cased title/content to the rows containing it, in
+        # ascending order. Rows never change, so entries never need
+        # removing; readers drop rows their snapshot doesn't see. The rows
+        # are kept in arrays rather than sets, which the cyclic garbage
+        # collector would walk element by element on every full collection.
+        self.trigrams_title: dict[str, "array[int]"] = {}
+        self.trigrams_content: dict[str, "array[int]"] = {}
+        # The number of posts whose latest row is current.
+        self.live = 0
+        # The compaction copying this log's current rows, if one is running.
+        self.compaction: Optional["_Compaction"] = None
+
+
+class _Compaction:
+    """The progress of copying a log's current rows to its successor."""
+
+    def __init__(self) -> None:
+        self.log = _Log()
+        # The next row of the compacted log to consider.
+        self.cursor = 0
+        # Maps each row copied so far to its row in the successor.
+        self.moved: dict[int, int] = {}
+
+
+class _Snapshot(NamedTuple):
+    """A published, read-only view of the post store."""
+
+    log: _Log
+    # Rows at or past this count were appended after the snapshot.
+    length: int
+    # Incremented every time a new snapshot is published.
+    version: int
+
+
+class _Draft(NamedTuple):
+    """The log a writer appends to, and the version it is preparing."""
+
+    log: _Log
+    version: int
+
+
+_T = TypeVar("_T")
+
+
+class _PendingWrite(Generic[_T]):
+    """A mutation queued by `_write`, and its outcome once applied."""
+
+    def __init__(self, mutation: Callable[..., Optional[_T]], args: tuple[Any, ...]) -> None:
+        self.mutation = mutation
+        self.args = args
+        self.done = False
+        self.result: Optional[_T] = None
+        self.error: Optional[Exception] = None
+
+
+_WRITE_LOCK = threading.Lock()
+
+# Writes waiting to be applied by whichever writer next holds the lock.
+_PENDING_WRITES: deque[_PendingWrite[Any]] = deque()
+
+# Prefixed to the snapshot version in ETags, so that validators handed out
+# before a restart (which resets the version) never match again.
+_ETAG_EPOCH = f"{time.time_ns():x}"
+
+_SortColumn = Callable[[_Log], list[str]]
+_GET_TITLES: _SortColumn = attrgetter("titles")
+_GET_CONTENTS: _SortColumn = attrgetter("contents")
+
+# Every valid (`sort`, `direction`) combination of GET /api/posts, mapped
+# to the log column to sort by (None to keep creation order) and
+# whether to reverse the order. Missing parameters are keyed as None.
+_SORT_DISPATCH: dict[tuple[Optional[str], Optional[str]], tuple[Optional[_SortColumn], bool]] = {
+    (None, None): (None, False),
+    (None, "asc"): (None, False),
+    (None, "desc"): (None, False),
+    ("title", None): (_GET_TITLES, False),
+    ("title", "asc"): (_GET_TITLES, False),
+    ("title", "desc"): (_GET_TITLES, True),
+    ("content", None): (_GET_CONTENTS, False),
+    ("content", "asc"): (_GET_CONTENTS, False),
+    ("content", "desc"): (_GET_CONTENTS, True),
+}
+
+# Compressors for the content codings GET /api/posts can respond with,
+# in order of preference.
+_COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    _COMPRESSORS["br"] = brotli.compress
+_COMPRESSORS["gzip"] = partial(gzip.compress, compresslevel=6)
+
+# Content codings offered to Accept-Encoding negotiation. `identity` comes
+# last, so compression only wins ties, never a higher client preference.
+_CODINGS = [*_COMPRESSORS, "identity"]
+
+# The snapshot the post list was last serialized from, and its JSON
+# payload keyed by content coding ('identity' for uncompressed).
+_POSTS_JSON_CACHE: Optional[tuple[_Snapshot, dict[str, bytes]]] = None
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Returns the set of all 3-character substrings of a string.
+
+    Args:
+        text (str): The string to split.
+
+    Returns:
+        set: The distinct trigrams of `text` (empty if it's shorter than 3).
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _write(mutation: Callable[..., Optional[_T]], *args: Any) -> Optional[_T]:
+    """
+    Applies a mutation to the store and publishes the result.
+
+    The mutation is queued, then the caller waits for `_WRITE_LOCK`. If a
+    writer holding the lock already applied it as part of its batch, the
+    caller returns right away; otherwise it applies the whole queue itself.
+    Either way, the write is visible to readers once this returns.
+
+    Args:
+        mutation (callable): Called as `mutation(draft, *args)`; returns
+            None if it left the draft unchanged. It must not raise after
+            it has started modifying the draft.
+        *args: Extra arguments for `mutation`.
+
+    Returns:
+        The return value of `mutation`.
+
+    Raises:
+        Exception: Whatever `mutation` raised.
+        RuntimeError: If the batch holding the write was aborted.
+    """
+    pending = _PendingWrite(mutation, args)
+    _PENDING_WRITES.append(pending)
+    with _WRITE_LOCK:
+        if not pending.done:
+            _flush_pending_writes()
+    if pending.error is not None:
+        raise pending.error
+    return pending.result
+
+
+def _flush_pending_writes() -> None:
+    """
+    Applies the queued writes as the next version and publishes it once.
+
+    Writes queued while the batch is applied are left for the next writer.
+    Must be called with `_WRITE_LOCK` held.
+    """
+    global _SNAPSHOT
+    snapshot = _SNAPSHOT
+    draft = _Draft(snapshot.log, snapshot.version + 1)
+    changed = False
+    batch = [_PENDING_WRITES.popleft() for _ in range(len(_PENDING_WRITES))]
+    try:
+        for pending in batch:
+            try:
+                pending.result = pending.mutation(draft, *pending.args)
+            except Exception as error:
+                pending.error = error
+            else:
+                changed = changed or pending.result is not None
+        if changed:
+            log = _compact_step(draft.log, len(draft.log.ids) - snapshot.length)
+            _SNAPSHOT = _Snapshot(log, len(log.ids), draft.version)
+    except BaseException:
+        # An asynchronous exception such as KeyboardInterrupt can land
+        # halfway through appending a row and leave the log's columns out
+        # of step. Drop the whole batch and carry on from a fresh copy of
+        # the last snapshot published before it, so no later write appends
+        # to a torn log. The new version keeps ETags from matching anything
+        # the batch may have published.
+        log = _rebuild(snapshot)
+        _SNAPSHOT = _Snapshot(log, len(log.ids), _SNAPSHOT.version + 1)
+        for pending in batch:
+            pending.result = None
+            pending.error = RuntimeError("The write was aborted before it was published.")
+        raise
+    finally:
+        for pending in batch:
+            pending.done = True
+
+
+def _append_row(log: _Log, post_id: int, title: str, content: str, prev: int) -> int:
+    """
+    Appends a version of a post to a log and indexes it.
+
+    Args:
+        log (_Log): The log to append to.
+        post_id (int): The ID of the post.
+        title (str): The title of the post.
+        content (str): The content of the post.
+        prev (int): The row of the post's previous version, or -1.
+
+    Returns:
+        int: The new row.
+    """
+    title_lc = title.lower()
+    content_lc = content.lower()
+    row = len(log.ids)
+    for index, text in ((log.trigrams_title, title_lc), (log.trigrams_content, content_lc)):
+        for gram in trigrams(text):
+            rows = index.get(gram)
+            if rows is None:
+                index[gram] = array("q", (row,))
+            else:
+                rows.append(row)
+    log.titles.append(title)
+    log.contents.append(content)
+    log.titles_lc.append(title_lc)
+    log.contents_lc.append(content_lc)
+    log.died.append(_ALIVE)
+    log.prev.append(prev)
+    log.ids.append(post_id)
+    log.row_by_id[post_id] = row
+    return row
+
+
+def _compact_step(log: _Log, appended: int) -> _Log:
+    """
+    Advances the compaction of a log, starting one if the log needs it.
+
+    Each step copies the current ones among the next `_COMPACT_STEP` rows,
+    plus as many rows as were appended since the last publish, so the
+    successor always gains on the log it copies.
+
+    Args:
+        log (_Log): The log about to be published.
+        appended (int): The number of rows appended since the last publish.
+
+    Returns:
+        _Log: The log to publish: `log`, or its successor once every
+        current row has been copied to it.
+    """
+    compaction = log.compaction
+    if compaction is None:
+        if len(log.ids) <= 2 * log.live + _COMPACT_SLACK:
+            return log
+        compaction = log.compaction = _Compaction()
+    successor = compaction.log
+    end = min(len(log.ids), compaction.cursor + _COMPACT_STEP + appended)
+    for row in range(compaction.cursor, end):
+        if log.died[row] == _ALIVE:
+            compaction.moved[row] = _append_row(successor, log.ids[row], log.titles[row],
+                                                log.contents[row], -1)
+    compaction.cursor = end
+    if end < len(log.ids):
+        return log
+    successor.live = log.live
+    log.compaction = None
+    return successor
+
+
+def _rebuild(snapshot: _Snapshot) -> _Log:
+    """
+    Returns a new log holding the posts a snapshot sees, in creation order.
+
+    Unlike compaction this re-indexes every post at once, taking time
+    proportional to the store; it is only used to recover from a torn log.
+    """
+    old = snapshot.log
+    log = _Log()
+    for row in _rows(snapshot):
+        _append_row(log, old.ids[row], old.titles[row], old.contents[row], -1)
+    log.live = len(log.ids)
+    return log
+
+
+def _retire(draft: _Draft, row: int) -> None:
+    """Marks a row as no longer current from the draft's version on."""
+    log = draft.log
+    log.died[row] = draft.version
+    # The copy of the row in a running compaction's successor retires too
+    compaction = log.compaction
+    if compaction is not None:
+        moved = compaction.moved.get(row)
+        if moved is not None:
+            compaction.log.died[moved] = draft.version
+
+
+def _rows(snapshot: _Snapshot) -> list[int]:
+    """Returns the rows of all posts in a snapshot, in creation order."""
+    log = snapshot.log
+    rows = list(compress(range(snapshot.length),
+                         map(snapshot.version.__lt__, islice(log.died, snapshot.length))))
+    # Updated posts move to a new row; sorting by ID restores creation order.
+    rows.sort(key=log.ids.__getitem__)
+    return rows
+
+
+def _find(snapshot: _Snapshot, post_id: int) -> Optional[int]:
+    """
+    Finds the row of a post in a snapshot.
+
+    Args:
+        snapshot (_Snapshot): The snapshot to search.
+        post_id (int): The ID of the post.
+
+    Returns:
+        int: The row of the post, or None if the snapshot has no such post.
+    """
+    log = snapshot.log
+    row = log.row_by_id.get(post_id, -1)
+    # Versions written after the snapshot link back to the one it sees.
+    while row >= snapshot.length:
+        row = log.prev[row]
+    if row < 0 or log.died[row] <= snapshot.version:
+        return None
+    return row
+
+
+def _posts_json(snapshot: _Snapshot, coding: str = "identity") -> bytes:
+    """
+    Returns the JSON encoding of all posts in a snapshot, in creation order.
+
+    The serialized bytes, and each compressed variant of them, are built
+    on first use and reused for as long as the snapshot is the current one,
+    so serializing and compressing is paid once per write, not per request.
+
+    Args:
+        snapshot (_Snapshot): The snapshot to serialize.
+        coding (str): 'identity', or a content coding in `_COMPRESSORS`.
+
+    Returns:
+        bytes: The serialized post list, compressed with `coding`.
+    """
+    global _POSTS_JSON_CACHE
+    cache = _POSTS_JSON_CACHE
+    if cache is None or cache[0] is not snapshot:
+        payloads = {"identity": orjson.dumps([_row(snapshot.log, row) for row in _rows(snapshot)])}
+        _POSTS_JSON_CACHE = (snapshot, payloads)
+    else:
+        payloads = cache[1]
+    payload = payloads.get(coding)
+    if payload is None:
+        payload = payloads[coding] = _COMPRESSORS[coding](payloads["identity"])
+    return payload
+
+
+def _row(log: _Log, row: int) -> dict[str, Any]:
+    """
+    Rebuilds the client-facing dict of the post stored at a row.
+
+    Args:
+        log (_Log): The log holding the post.
+        row (int): The row of the post.
+
+    Returns:
+        dict: The post's 'id', 'title' and 'content' fields.
+    """
+    return {"id": log.ids[row], "title": log.titles[row], "content": log.contents[row]}
+
+
+def _current_row(log: _Log, post_id: int) -> Optional[int]:
+    """Returns the row of the latest version of a post, or None if it's deleted."""
+    row = log.row_by_id.get(post_id)
+    if row is None or log.died[row] != _ALIVE:
+        return None
+    return row
+
+
+def _create(draft: _Draft, title: str, content: str) -> dict[str, Any]:
+    """
+    Stores a new post with a freshly allocated ID in a draft.
+
+    Args:
+        draft (_Draft): The draft to modify.
+        title (str): The title of the post.
+        content (str): The content of the post.
+
+    Returns:
+        dict: The new post.
+    """
+    row = _append_row(draft.log, get_id(), title, content, -1)
+    draft.log.live += 1
+    return _row(draft.log, row)
+
+
+def _update(draft: _Draft, post_id: int, fields: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """
+    Stores a new version of a post in a draft, with its title and/or content replaced.
+
+    Args:
+        draft (_Draft): The draft to modify.
+        post_id (int): The ID of the post.
+        fields (dict): The new values, keyed by 'title' and/or 'content'.
+
+    Returns:
+        dict: The updated post, or None if there is no such post.
+    """
+    log = draft.log
+    row = _current_row(log, post_id)
+    if row is None:
+        return None
+    title = fields.get("title", log.titles[row])
+    content = fields.get("content", log.contents[row])
+    new_row = _append_row(log, post_id, title, content, row)
+    _retire(draft, row)
+    return _row(log, new_row)
+
+
+def _delete(draft: _Draft, post_id: int) -> Optional[bool]:
+    """
+    Deletes a post from a draft.
+
+    Args:
+        draft (_Draft): The draft to modify.
+        post_id (int): The ID of the post.
+
+    Returns:
+        bool: True if the post was deleted, or None if there is no such post.
+    """
+    log = draft.log
+    row = _current_row(log, post_id)
+    if row is None:
+        return None
+    _retire(draft, row)
+    log.live -= 1
+    return True
+
+
+def find_matching_rows(snapshot: _Snapshot, needle: str,
+                       index: Mapping[str, "array[int]"], column: list[str]) -> set[int]:
+    """
+    Finds the posts whose lower-cased field contains a substring.
+
+    Needles of 3 or more characters are looked up in the trigram index:
+    only rows containing the needle's rarest trigram are candidates, and
+    each candidate is then checked for the full substring. Shorter needles
+    have no trigrams and fall back to scanning the whole column.
+
+    Args:
+        snapshot (_Snapshot): The snapshot to search.
+        needle (str): The lower-cased substring to look for.
+        index (Mapping): The log's trigram index of the field.
+        column (list): The log's lower-cased column of the field.
+
+    Returns:
+        set: The rows of the matching posts.
+    """
+    length = snapshot.length
+    grams = trigrams(needle)
+    if not grams:
+        rows = {row for row, text in enumerate(islice(column, length)) if needle in text}
+    else:
+        rarest: Optional["array[int]"] = None
+        for gram in grams:
+            posting = index.get(gram)
+            if posting is None:
+                return set()
+            if rarest is None or len(posting) < len(rarest):
+                rarest = posting
+        assert rarest is not None
+        # Writers keep appending rows past the snapshot's to the postings
+        candidates = islice(rarest, bisect_left(rarest, length))
+        rows = {row for row in candidates if needle in column[row]}
+    died = snapshot.log.died
+    version = snapshot.version
+    return {row for row in rows if died[row] > version}
+
+
+def _seed(posts: list[dict[str, Any]]) -> _Snapshot:
+    """
+    Builds the first published snapshot from a list of posts.
+
+    Args:
+        posts (list): The posts, with 'id', 'title' and 'content' fields.
+
+    Returns:
+        _Snapshot: A snapshot holding the posts, at version 1.
+    """
+    log = _Log()
+    for post in posts:
+        _append_row(log, post["id"], post["title"], post["content"], -1)
+    log.live = len(posts)
+    return _Snapshot(log, len(log.ids), 1)
+
+
+_SNAPSHOT = _seed([
     {"id": 1, "title": "First post", "content": "This is the first post."},
     {"id": 2, "title": "Second post", "content": "This is the second post."},
-]
+])
+
+_NEXT_ID = max(_SNAPSHOT.log.ids, default=0) + 1
 
-def get_id():
+
+def get_id() -> int:
     """
     Generates a unique identifier for a new blog post.
 
-    The function calculates the next available ID by finding the
-    maximum existing ID among all blog posts in the POSTS list
-    and adding 1.
+    IDs are handed out from a module-level counter that is seeded from
+    the highest existing post ID at startup and incremented on every
+    call, so allocating an ID doesn't need to scan the existing posts.
+    Must be called with `_WRITE_LOCK` held.
 
     Returns:
         int: The next unique blog post ID.
     """
-    try:
-        new_id = max(post["id"] for post in POSTS) + 1
-    except ValueError:
-        new_id = 0
+    global _NEXT_ID
+    new_id = _NEXT_ID
+    _NEXT_ID += 1
     return new_id
 
 
-def validate_required_fields(request_body, required_fields):
+_REQUIRED_POST_FIELDS = ("title", "content")
+_UPDATABLE_FIELDS = ("title", "content")
+
+
+def validate_required_fields(request_body: Any,
+                             required_fields: tuple[str, ...]) -> Optional[tuple[Response, int]]:
     """
     Validates the presence of required fields in a request body.
 
-    Iterates through a list of required fields and checks if each field
-    is present in the provided request body. If any required field is missing,
-    it returns an error response with a 400 status code.
+    Collects the required fields that are absent from the provided request
+    body. If any required field is missing, it returns an error response
+    with a 400 status code. A body that isn't a JSON object is missing
+    every field.
 
     Args:
-        request_body (dict): The body of the request to validate.
-        required_fields (list): A list of field names that are required.
+        request_body (Any): The parsed JSON body of the request to validate.
+        required_fields (tuple): The field names that are required.
 
     Returns:
         tuple: A JSON response with an error message and a 400 status code
                if a required field is missing, or None if all fields are present.
     """
-    missing_fields = []
-    for field in required_fields:
-        if field not in request_body:
-            missing_fields.append(field)
-    n = len(missing_fields)
-    if n > 0:
-        error_msg = f"{', '.join(missing_fields)} fields are required!"
-        if n == 1:
-            error_msg = f"{missing_fields[0]} is required!"
-        return jsonify({"error": error_msg}), 400
+    body_keys = request_body.keys() if isinstance(request_body, dict) else ()
+    missing_fields = [field for field in required_fields if field not in body_keys]
+    if missing_fields:
+        suffix = "is required!" if len(missing_fields) == 1 else "fields are required!"
+        return jsonify({"error": f"{', '.join(missing_fields)} {suffix}"}), 400
+    return None
+
+
+def validate_string_fields(fields: Mapping[str, Any]) -> Optional[tuple[Response, int]]:
+    """
+    Validates that all given fields hold string values.
+
+    Titles and contents are lower-cased and indexed when they are stored,
+    so anything else is rejected before it reaches the store.
+
+    Args:
+        fields (Mapping): The field values to validate, keyed by field name.
+
+    Returns:
+        tuple: A JSON response with an error message and a 400 status code
+               if a field isn't a string, or None if all fields are strings.
+    """
+    invalid_fields = [field for field, value in fields.items() if not isinstance(value, str)]
+    if invalid_fields:
+        suffix = "must be a string!" if len(invalid_fields) == 1 else "fields must be strings!"
+        return jsonify({"error": f"{', '.join(invalid_fields)} {suffix}"}), 400
     return None
 
 
 @app.route('/api/posts', methods=['GET', 'POST'])
-def handle_posts():
+def handle_posts() -> ResponseReturnValue:
     """
     Handles HTTP requests for managing blog posts.
 
@@ -68,64 +699,83 @@ def handle_posts():
         - sort: Field to sort by ('title' or 'content')
         - direction: Sort direction ('asc' or 'desc')
     - **POST**: Adds a new blog post. The request body must include
-      "title" and "content" fields. If any required field is missing,
-      an error response is returned with a 400 status code. If the post
-      is successfully created, it is added to the `POSTS` list, and a
-      JSON response with the newly created post and a 201 status code
-      is returned.
+      "title" and "content" string fields. If any required field is
+      missing or isn't a string, an error response is returned with a
+      400 status code. If the post is successfully created, it is
+      stored as a new row, and a JSON response with the newly created
+      post and a 201 status code is returned.
 
     Returns:
         - For GET: 
-          - JSON response containing all blog posts, optionally sorted.
+          - JSON response containing all blog posts, optionally sorted,
+            with a weak ETag that changes whenever any post does. The
+            unsorted list is Brotli- or gzip-compressed when the client
+            accepts it.
+          - 304 if the If-None-Match header matches the current ETag.
           - 400 if invalid sort parameters are provided.
         - For POST:
           - If successful, a JSON response with the new post and a
             201 status code.
           - If validation fails, a JSON error message with a 400 status code.
     """
-    if request.method == 'POST':
+    method = request.method
+    if method == 'POST':
         req_body = request.get_json()
-        error = validate_required_fields(req_body, ["title", "content"])
+        error = (validate_required_fields(req_body, _REQUIRED_POST_FIELDS)
+                 or validate_string_fields({field: req_body[field] for field in _REQUIRED_POST_FIELDS}))
         if error:
             return error
-        new_post = {
-            "id": get_id(),
-            "title": req_body["title"],
-            "content": req_body["content"]
-        }
-        POSTS.append(new_post)
+        new_post = _write(_create, req_body["title"], req_body["content"])
         return jsonify(new_post), 201
     
     # GET method
+    snapshot = _SNAPSHOT
     # Get sorting parameters from query string
-    sort_field = request.args.get('sort')
-    sort_direction = request.args.get('direction')
+    # Typed as a plain Mapping so compiled builds dispatch to MultiDict.get
+    # instead of calling dict.get on it directly
+    args: Mapping[str, str] = request.args
+    sort_field = args.get('sort') or None
+    sort_direction = args.get('direction') or None
     
     # Validate parameters if provided
-    if sort_field and sort_field not in ['title', 'content']:
-        return jsonify({"error": "Invalid sort field. Must be 'title' or 'content'."}), 400
-    
-    if sort_direction and sort_direction not in ['asc', 'desc']:
+    sort_spec = _SORT_DISPATCH.get((sort_field, sort_direction))
+    if sort_spec is None:
+        if sort_field not in (None, 'title', 'content'):
+            return jsonify({"error": "Invalid sort field. Must be 'title' or 'content'."}), 400
         return jsonify({"error": "Invalid sort direction. Must be 'asc' or 'desc'."}), 400
+    sort_column, reverse = sort_spec
     
-    # If sort parameters are valid, sort the posts
-    if sort_field:
-        # Create a copy of POSTS to sort
-        sorted_posts = sorted(POSTS, key=lambda post: post[sort_field], reverse=(sort_direction == 'desc'))
-        return jsonify(sorted_posts)
-    
-    # If no sorting is requested, return posts in original order
-    return jsonify(POSTS)
+    # The response only changes when the store does, so the snapshot
+    # version doubles as a validator for conditional requests
+    etag = f"{_ETAG_EPOCH}-{snapshot.version}"
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    elif sort_column is not None:
+        # Sort the row numbers by the sort column, then rebuild the posts
+        log = snapshot.log
+        sorted_rows = sorted(_rows(snapshot), key=sort_column(log).__getitem__, reverse=reverse)
+        response = jsonify([_row(log, row) for row in sorted_rows])
+    else:
+        # If no sorting is requested, return posts in original order,
+        # compressed with the best coding the client accepts
+        coding = request.accept_encodings.best_match(_CODINGS) or "identity"
+        response = app.response_class(_posts_json(snapshot, coding), mimetype="application/json")
+        if coding != "identity":
+            response.headers["Content-Encoding"] = coding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
 
 
 @app.route('/api/posts/<int:post_id>', methods=['PUT', 'DELETE'])
-def handle_post(post_id):
+def handle_post(post_id: int) -> ResponseReturnValue:
     """
     Handles updating or deleting a post by its ID.
 
     Depending on the HTTP method, this function either updates the fields
     of an existing post (`PUT`) or deletes the post (`DELETE`) from the
-    global POSTS list.
+    post store.
 
     Args:
         post_id (int): The ID of the post to update or delete.
@@ -134,36 +784,51 @@ def handle_post(post_id):
         Response:
             - `PUT`:
                 - 200 with the updated post if successful.
+                - 400 if the body isn't a JSON object, or a new title or
+                  content isn't a string.
                 - 404 if the post is not found.
             - `DELETE`:
                 - 200 with a success message if the post is deleted.
                 - 404 if the post is not found.
     """
-    global POSTS
-    selected_post = next((post for post in POSTS if post["id"] == post_id), None)
-    if selected_post:
-        if request.method == 'PUT':
-            valid_updated_fields = {}
-            for key in request.get_json():
-                if key in ["title", "content"]:
-                    valid_updated_fields[key] = request.get_json()[key]
-            selected_post.update(valid_updated_fields)
-            return jsonify(selected_post), 200
-        POSTS.remove(selected_post)
-        return jsonify({
-            "message": f"Post with id {post_id} has been deleted successfully."
-        }), 200
+    method = request.method
+    snapshot = _SNAPSHOT
+    row = _find(snapshot, post_id)
+    if row is not None:
+        if method == 'PUT':
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict):
+                # Report a malformed or non-object body instead of
+                # answering as if an empty update had succeeded
+                if request.get_data():
+                    return jsonify({"error": "Request body must be a JSON object."}), 400
+                body = {}
+            valid_updated_fields = {key: body[key] for key in _UPDATABLE_FIELDS if key in body}
+            if not valid_updated_fields:
+                return jsonify(_row(snapshot.log, row)), 200
+            error = validate_string_fields(valid_updated_fields)
+            if error:
+                return error
+            updated_post = _write(_update, post_id, valid_updated_fields)
+            if updated_post is not None:
+                return jsonify(updated_post), 200
+        elif _write(_delete, post_id):
+            return jsonify({
+                "message": f"Post with id {post_id} has been deleted successfully."
+            }), 200
+    # The post doesn't exist, or was deleted by a concurrent request
     return jsonify({"error": f"Post with id {post_id} doesn't exist."}), 404
 
 
 @app.route('/api/posts/search', methods=['GET'])
-def search_posts():
+def search_posts() -> ResponseReturnValue:
     """
     Search posts based on title and content query parameters.
 
     This endpoint allows searching through posts by matching case-insensitive
     substrings in either the title or content fields. If both title and content
     parameters are provided, posts matching either condition will be returned.
+    Missing or empty parameters don't match anything.
 
     Args:
         title (str, optional): Substring to search for in post titles
@@ -174,16 +839,30 @@ def search_posts():
               contains 'title' and 'content' fields. Returns empty list if no
               matches are found.
     """
-    title = request.args.get('title')
-    content = request.args.get('content')
+    args: Mapping[str, str] = request.args
+    title = args.get('title')
+    content = args.get('content')
+
+    # Empty parameters are ignored: an empty substring would match every post
+    if not title and not content:
+        return jsonify([]), 200
+
+    # Case-fold the query once; the stored columns are already lower-cased
+    title_lc = title.lower() if title else None
+    content_lc = content.lower() if content else None
+
+    snapshot = _SNAPSHOT
+    log = snapshot.log
+    matching_rows = set()
+    if title_lc is not None:
+        matching_rows |= find_matching_rows(snapshot, title_lc, log.trigrams_title, log.titles_lc)
+    if content_lc is not None:
+        matching_rows |= find_matching_rows(snapshot, content_lc, log.trigrams_content, log.contents_lc)
 
-    results = []
-    for post in POSTS:
-        if (title is not None and title.lower() in post['title'].lower() or
-                content is not None and content.lower() in post['content'].lower()):
-            results.append(post)
+    # Sort by ID to return the results in creation order
+    results = [_row(log, row) for row in sorted(matching_rows, key=log.ids.__getitem__)]
     return jsonify(results), 200
 
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=5002, debug=True)
+    app.run(host="0.0.0.0", port=5002, debug=os.environ.get("FLASK_ENV") == "dev")
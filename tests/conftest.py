@@ -0,0 +1,19 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def store():
+    """The backend module, reloaded so every test starts from the seed posts."""
+    from backend import backend_app
+    return importlib.reload(backend_app)
+
+
+@pytest.fixture
+def client(store):
+    return store.app.test_client()
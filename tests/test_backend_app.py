@@ -0,0 +1,254 @@
+import gzip
+import random
+import threading
+import time
+
+import pytest
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def _wait_for_pending_writes(store, count):
+    deadline = time.monotonic() + 5
+    while len(store._PENDING_WRITES) < count:
+        assert time.monotonic() < deadline, "writers never queued their writes"
+        time.sleep(0.001)
+
+
+def test_concurrent_writes_are_published_as_one_version(store, client):
+    writers = 8
+    version = store._SNAPSHOT.version
+    created = []
+
+    def create(i):
+        created.append(client.post('/api/posts', json={"title": f"Post {i}", "content": "body"}).get_json())
+
+    # Hold the lock so every writer queues up behind it, then let one
+    # of them apply the whole queue.
+    with store._WRITE_LOCK:
+        threads = [_start(create, i) for i in range(writers)]
+        _wait_for_pending_writes(store, writers)
+    for thread in threads:
+        thread.join()
+
+    assert store._SNAPSHOT.version == version + 1
+    assert len({post["id"] for post in created}) == writers
+    listed = client.get('/api/posts').get_json()
+    assert all(post in listed for post in created)
+
+
+def test_writes_are_visible_once_they_return(store, client):
+    errors = []
+
+    def write_then_read(i):
+        post = client.post('/api/posts', json={"title": f"Mine {i}", "content": "x"}).get_json()
+        if post not in client.get('/api/posts').get_json():
+            errors.append(("created", post))
+        updated = client.put(f'/api/posts/{post["id"]}', json={"content": f"edited {i}"}).get_json()
+        found = client.get('/api/posts/search', query_string={"content": f"edited {i}"}).get_json()
+        if updated not in found:
+            errors.append(("updated", updated))
+        client.delete(f'/api/posts/{post["id"]}')
+        if post["id"] in [listed["id"] for listed in client.get('/api/posts').get_json()]:
+            errors.append(("deleted", post))
+
+    threads = [_start(write_then_read, i) for i in range(8)]
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_search_agrees_with_a_scan_of_all_posts(store, client):
+    rng = random.Random(0)
+    words = ["Foo", "bar", "BAZ", "post", "Hello", "ab", "a", "zz"]
+    # Let the index be compacted along the way too.
+    store._COMPACT_SLACK = 0
+
+    def text():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(0, 4)))
+
+    for _ in range(300):
+        posts = client.get('/api/posts').get_json()
+        roll = rng.random()
+        if roll < 0.5 or not posts:
+            client.post('/api/posts', json={"title": text(), "content": text()})
+        elif roll < 0.8:
+            client.put(f'/api/posts/{rng.choice(posts)["id"]}', json={"title": text()})
+        else:
+            client.delete(f'/api/posts/{rng.choice(posts)["id"]}')
+
+        posts = client.get('/api/posts').get_json()
+        field = rng.choice(["title", "content"])
+        needle = rng.choice(words + ["o b", "ello", "OST", "xyz"])[:rng.randint(1, 5)]
+        found = client.get('/api/posts/search', query_string={field: needle}).get_json()
+        assert found == [post for post in posts if needle.lower() in post[field].lower()]
+
+
+class _Interrupt(BaseException):
+    pass
+
+
+def _interrupt_mid_append(draft):
+    # Stop where an asynchronous exception could: after some of a new
+    # row's columns were appended but not the others.
+    draft.log.titles.append("Torn")
+    raise _Interrupt
+
+
+def test_aborted_batch_fails_every_write_and_keeps_the_log_whole(store, client):
+    before = client.get('/api/posts')
+    batch = [store._PendingWrite(store._create, ("Applied", "x")),
+             store._PendingWrite(_interrupt_mid_append, ()),
+             store._PendingWrite(store._create, ("Skipped", "x"))]
+    store._PENDING_WRITES.extend(batch)
+    with store._WRITE_LOCK, pytest.raises(_Interrupt):
+        store._flush_pending_writes()
+
+    assert all(pending.done for pending in batch)
+    assert all(isinstance(pending.error, RuntimeError) for pending in batch)
+    # None of the batch is published, and the ETag moves on regardless.
+    after = client.get('/api/posts')
+    assert after.get_json() == before.get_json()
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+    log = store._SNAPSHOT.log
+    columns = (log.ids, log.titles, log.contents, log.titles_lc, log.contents_lc, log.died, log.prev)
+    assert len({len(column) for column in columns}) == 1
+    post = client.post('/api/posts', json={"title": "After", "content": "x"}).get_json()
+    assert client.get('/api/posts').get_json() == before.get_json() + [post]
+    assert client.get('/api/posts/search', query_string={"title": "after"}).get_json() == [post]
+
+
+def test_post_list_etag_is_the_store_version(store, client):
+    response = client.get('/api/posts')
+    etag = f'W/"{store._ETAG_EPOCH}-{store._SNAPSHOT.version}"'
+    assert response.headers["ETag"] == etag
+
+    revalidated = client.get('/api/posts', headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+    assert revalidated.headers["ETag"] == etag
+    # Weak comparison also matches the strong form of the same tag.
+    strong = etag.removeprefix("W/")
+    assert client.get('/api/posts?sort=title', headers={"If-None-Match": strong}).status_code == 304
+    assert client.get('/api/posts', headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+
+@pytest.mark.parametrize("write", [
+    lambda client: client.post('/api/posts', json={"title": "New", "content": "x"}),
+    lambda client: client.put('/api/posts/1', json={"title": "Changed"}),
+    lambda client: client.delete('/api/posts/1'),
+])
+def test_post_list_etag_changes_on_every_write(client, write):
+    etag = client.get('/api/posts').headers["ETag"]
+    assert write(client).status_code in (200, 201)
+    response = client.get('/api/posts', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_post_list_must_be_revalidated(client):
+    for url in ('/api/posts', '/api/posts?sort=content&direction=desc'):
+        response = client.get(url)
+        revalidated = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+        for checked in (response, revalidated):
+            assert checked.headers["Cache-Control"] == "private, max-age=0, must-revalidate"
+
+
+def _decompress_gzip(data):
+    return gzip.decompress(data)
+
+
+def _decompress_br(data):
+    return pytest.importorskip("brotli").decompress(data)
+
+
+@pytest.mark.parametrize("coding, decompress", [
+    ("gzip", _decompress_gzip),
+    ("br", _decompress_br),
+])
+def test_post_list_is_compressed_when_accepted(store, client, coding, decompress):
+    if coding not in store._COMPRESSORS:
+        pytest.skip(f"{coding} isn't available")
+    identity = client.get('/api/posts', headers={"Accept-Encoding": "identity"})
+    compressed = client.get('/api/posts', headers={"Accept-Encoding": coding})
+    assert "Content-Encoding" not in identity.headers
+    assert compressed.headers["Content-Encoding"] == coding
+    assert decompress(compressed.data) == identity.data
+    for response in (identity, compressed):
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_post_list_prefers_the_clients_preferred_coding(client):
+    response = client.get('/api/posts', headers={"Accept-Encoding": "identity;q=1, gzip;q=0.1"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == client.get('/api/posts').get_json()
+
+    # Compression wins ties with identity, and anything over no header.
+    tie = client.get('/api/posts', headers={"Accept-Encoding": "gzip, identity"})
+    assert tie.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in client.get('/api/posts').headers
+
+
+def test_sorted_post_list_varies_on_accept_encoding(client):
+    response = client.get('/api/posts?sort=title', headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"title": 1, "content": "x"}, "title must be a string!"),
+    ({"title": "x", "content": None}, "content must be a string!"),
+    ({"title": ["x"], "content": {"x": 1}}, "title, content fields must be strings!"),
+])
+def test_post_rejects_non_string_fields_without_using_an_id(client, body, error):
+    response = client.post('/api/posts', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+    created = client.post('/api/posts', json={"title": "Next", "content": "x"}).get_json()
+    assert created["id"] == 3
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"title": 1}, "title must be a string!"),
+    ({"content": 2, "title": 1}, "title, content fields must be strings!"),
+])
+def test_put_rejects_non_string_fields(client, body, error):
+    before = client.get('/api/posts').get_json()
+    response = client.put('/api/posts/1', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+    assert client.get('/api/posts').get_json() == before
+
+
+@pytest.mark.parametrize("data, content_type", [
+    ("[1]", "application/json"),
+    ('"title"', "application/json"),
+    ("{not json", "application/json"),
+    ("title=x", "text/plain"),
+])
+def test_put_rejects_a_body_that_isnt_a_json_object(client, data, content_type):
+    before = client.get('/api/posts').get_json()
+    response = client.put('/api/posts/1', data=data, content_type=content_type)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a JSON object."}
+    assert client.get('/api/posts').get_json() == before
+
+
+def test_put_without_a_body_returns_the_post_unchanged(client):
+    post = client.get('/api/posts').get_json()[0]
+    response = client.put(f'/api/posts/{post["id"]}')
+    assert response.status_code == 200
+    assert response.get_json() == post
+
+
+@pytest.mark.parametrize("data", ['[]', '["title", "content"]', '"title"', '1', 'null'])
+def test_post_treats_a_non_object_body_as_missing_every_field(client, data):
+    response = client.post('/api/posts', data=data, content_type="application/json")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "title, content fields are required!"}
+    assert len(client.get('/api/posts').get_json()) == 2